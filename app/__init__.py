@@ -2,6 +2,8 @@ from .routes import init_routes
 from config import config
 from flask import Flask
 import logging
+import queue
+import threading
 
 # 全域設定 LOGGING
 logging.basicConfig(
@@ -14,11 +16,35 @@ def create_app():
     """
     建立並回傳 Flask 應用
     - 讀取設定
+    - 啟動背景更新 worker
     - 初始化路由
     """
     app = Flask(__name__)
     # 載入 config 物件中的所有設定
     app.config.from_object(config)
+    # 更新鎖：唯一的受理控制，從 /update 受理到背景工作結束期間持有，期間其他請求回傳 429
+    app.config["update_lock"] = threading.Lock()
+    # 背景更新佇列：由單一常駐 worker 依序執行 (受更新鎖限制，佇列中最多一個工作)
+    update_queue = queue.Queue()
+    app.config["update_queue"] = update_queue
+    threading.Thread(
+        target=_drain_update_queue, args=(update_queue,), daemon=True
+    ).start()
     # 註冊路由
     init_routes(app)
     return app
+
+
+def _drain_update_queue(update_queue):
+    """
+    常駐 worker：逐一取出並執行佇列中的更新工作
+    """
+    while True:
+        job = update_queue.get()
+        try:
+            job()
+        except Exception:
+            # 不讓例外中止唯一的 worker，否則後續更新將永遠無法執行
+            logging.getLogger(__name__).exception("‼️ Update worker job crashed")
+        finally:
+            update_queue.task_done()
@@ -1,7 +1,5 @@
 import gc
-import psutil
 import datetime
-import threading
 import logging
 
 from flask import request, Response
@@ -10,6 +8,9 @@ from .views import update_and_broadcast
 
 logger = logging.getLogger(__name__)
 
+# Cached handle of the current process for /wakeup memory reporting (created on first use)
+_PROC = None
+
 
 def init_routes(app):
     @app.route("/", methods=["GET"])
@@ -26,7 +27,7 @@ def init_routes(app):
         """
         signature = request.headers.get("X-Line-Signature", "")
         body = request.get_data(as_text=True)
-        logger.info(f"Request body: {body}")
+        logger.info("Request body: %s", body)
         try:
             handler = app.config["WEBHOOK_HANDLER"]
             handler.handle(body, signature)
@@ -40,10 +41,14 @@ def init_routes(app):
         """
         Wake up the service and perform garbage collection.
         """
+        global _PROC
         gc.collect()
         try:
-            memory_usage = psutil.Process().memory_info().rss / 1024**2
-            logger.debug(f"💾 Memory usage after GC: {memory_usage:.2f} MB")
+            import psutil
+            if _PROC is None:
+                _PROC = psutil.Process()
+            memory_usage = _PROC.memory_info().rss / 1024**2
+            logger.debug("💾 Memory usage after GC: %.2f MB", memory_usage)
         except Exception:
             logger.debug("psutil not available or error getting memory usage")
         return Response(status=200)
@@ -53,11 +58,6 @@ def init_routes(app):
         """
         Update data and optionally broadcast stock recommendations.
         """
-        # Prevent overlapping updates
-        if app.config.get("is_updating", False):
-            logger.warning("🚧 Update already in progress")
-            return Response("Update already in progress", status=429)
-
         # Validate API-Access-Token header
         token = request.headers.get("API-Access-Token")
         if not token:
@@ -71,10 +71,13 @@ def init_routes(app):
         date_str = request.headers.get("Target-Date")
         if date_str:
             try:
-                target_date = datetime.datetime.strptime(
-                    date_str, "%Y-%m-%d").date()
+                # fromisoformat also accepts forms like 20250708 or 2025-W28-2;
+                # only allow the exact YYYY-MM-DD layout
+                if len(date_str) != 10 or date_str[4] != "-" or date_str[7] != "-":
+                    raise ValueError(date_str)
+                target_date = datetime.date.fromisoformat(date_str)
             except ValueError:
-                logger.warning(f"Invalid Target-Date format: {date_str}")
+                logger.warning("Invalid Target-Date format: %s", date_str)
                 return Response("Invalid Target-Date format", status=400)
         else:
             target_date = datetime.date.today()
@@ -87,20 +90,32 @@ def init_routes(app):
         else:
             need_broadcast = str(raw_broadcast).lower() == "true"
 
-        # Set update flag and spawn background thread
-        app.config["is_updating"] = True
+        # Determine force-refresh flag (header or query param, default False);
+        # bypasses the watch lists cached for the same date
+        raw_force_refresh = request.headers.get(
+            "Force-Refresh") or request.args.get("force_refresh")
+        force_refresh = str(raw_force_refresh).lower() == "true"
+
+        # The lock is the only admission control: it is held from here until
+        # the task finishes, so at most one update is queued or running
+        update_lock = app.config["update_lock"]
+        if not update_lock.acquire(blocking=False):
+            logger.warning("🚧 Update already in progress")
+            return Response("Update already in progress", status=429)
 
         def task():
             with app.app_context():
                 try:
-                    update_and_broadcast(app, target_date, need_broadcast)
+                    update_and_broadcast(
+                        target_date, need_broadcast, force_refresh)
                 except Exception:
                     logger.exception("‼️ Update task crashed")
                 finally:
-                    app.config["is_updating"] = False
-                    logger.info("🔄 Update flag reset, ready for next request")
+                    update_lock.release()
+                    logger.info("🔄 Update lock released, ready for next request")
 
-        threading.Thread(target=task, daemon=True).start()
-        logger.info(
-            f"🚀 Spawned update task date={target_date} broadcast={need_broadcast}")
+        # Hand the task to the background worker
+        app.config["update_queue"].put(task)
+        logger.info("🚀 Queued update task date=%s broadcast=%s force_refresh=%s",
+                    target_date, need_broadcast, force_refresh)
         return Response(status=200)
@@ -1,6 +1,7 @@
 import time
 import datetime
 import twstock
+import numpy as np
 import pandas as pd
 
 from config import logger
@@ -29,26 +30,14 @@ def _today_price_is_max_check_row(row, price_type, days) -> bool:
 
 # 2. (Public) 近 N 天成交量皆大於等於 X 「張」
 def volume_greater_check_df(df, shares_threshold=500, days=1):
-    return df.apply(
-        _volume_greater_check_row, shares_threshold=shares_threshold, days=days, axis=1
+    return pd.Series(
+        volume_greater_check_np(
+            indicator_history_np(df, "volume", days), shares_threshold, days
+        ),
+        index=df.index,
     )
 
 
-def _volume_greater_check_row(row, shares_threshold, days) -> bool:
-    # # 如果只找今天的成交量的話，直接從「成交量」欄位抓資料，因為這個欄位的資料較準確
-    # if days == 1 and row["成交量"]:
-    #     return row["成交量"] >= shares_threshold
-    try:
-        last_n_days_data = row["volume"][-1 : (-1 - days) : -1]
-        last_n_days_volume = [each[1] for each in last_n_days_data]
-        return all(
-            single_day_volume >= shares_threshold
-            for single_day_volume in last_n_days_volume
-        )
-    except:
-        return False
-
-
 # 3. (Public) 今天某類型價格不是 N 天中最低 (price_type=開盤/最高/最低／收盤)
 def today_price_is_not_min_check_df(df, price_type="收盤", days=3):
     return df.apply(
@@ -93,146 +82,51 @@ def _today_price_is_not_max_check_row(row, price_type, days) -> bool:
 def technical_indicator_greater_or_less_one_day_check_df(
     df, indicator_1="收盤", indicator_2="mean5", direction="more", threshold=1, days=1
 ):
-    return df.apply(
-        _technical_indicator_greater_or_less_one_day_check_row,
-        indicator_1=indicator_1,
-        indicator_2=indicator_2,
-        direction=direction,
-        threshold=threshold,
-        days=days,
-        axis=1,
+    return pd.Series(
+        technical_indicator_greater_or_less_one_day_check_np(
+            indicator_history_np(df, indicator_1, days),
+            indicator_history_np(df, indicator_2, days),
+            direction,
+            threshold,
+            days,
+        ),
+        index=df.index,
     )
 
 
-def _technical_indicator_greater_or_less_one_day_check_row(
-    row, indicator_1, indicator_2, direction, threshold, days
-) -> bool:
-    try:
-        if indicator_1 in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator_1 = [
-                each[1][indicator_1] for each in row["daily_k"][-1 : (-1 - days) : -1]
-            ]
-        else:
-            last_n_days_indicator_1 = [
-                each[1] for each in row[indicator_1][-1 : (-1 - days) : -1]
-            ]
-        if indicator_2 in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator_2 = [
-                each[1][indicator_2] for each in row["daily_k"][-1 : (-1 - days) : -1]
-            ]
-        else:
-            last_n_days_indicator_2 = [
-                each[1] for each in row[indicator_2][-1 : (-1 - days) : -1]
-            ]
-        if direction == "more":
-            return all(
-                i_1 > (threshold * i_2)
-                for i_1, i_2 in zip(last_n_days_indicator_1, last_n_days_indicator_2)
-            )
-        else:
-            return all(
-                i_1 < (threshold * i_2)
-                for i_1, i_2 in zip(last_n_days_indicator_1, last_n_days_indicator_2)
-            )
-    except:
-        return False
-
-
 # 6. (Public) 今天的 X 指標與今天的 Y 指標差距小於 Z (ex. |D9-K9| < 10) 並持續至少 N 天
 #  (indicator = 'k9', 'd9', 'dif', 'macd', 'osc', 'mean5', 'mean10', 'mean20', 'mean60', 'volume', '開盤', '收盤', '最高', '最低')
 def technical_indicator_difference_one_day_check_df(
     df, indicator_1="k9", indicator_2="d9", difference_threshold=10, days=1
 ):
-    return df.apply(
-        _technical_indicator_difference_one_day_check_row,
-        indicator_1=indicator_1,
-        indicator_2=indicator_2,
-        difference_threshold=difference_threshold,
-        days=days,
-        axis=1,
+    return pd.Series(
+        technical_indicator_difference_one_day_check_np(
+            indicator_history_np(df, indicator_1, days),
+            indicator_history_np(df, indicator_2, days),
+            difference_threshold,
+            days,
+        ),
+        index=df.index,
     )
 
 
-def _technical_indicator_difference_one_day_check_row(
-    row, indicator_1, indicator_2, difference_threshold, days
-) -> bool:
-    try:
-        if indicator_1 in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator_1 = [
-                each[1][indicator_1] for each in row["daily_k"][-1 : (-1 - days) : -1]
-            ]
-        else:
-            last_n_days_indicator_1 = [
-                each[1] for each in row[indicator_1][-1 : (-1 - days) : -1]
-            ]
-        if indicator_2 in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator_2 = [
-                each[1][indicator_2] for each in row["daily_k"][-1 : (-1 - days) : -1]
-            ]
-        else:
-            last_n_days_indicator_2 = [
-                each[1] for each in row[indicator_2][-1 : (-1 - days) : -1]
-            ]
-        return all(
-            abs(i_1 - i_2) < difference_threshold
-            for i_1, i_2 in zip(last_n_days_indicator_1, last_n_days_indicator_2)
-        )
-    except:
-        return False
-
-
 # 7. (Public) 今天的 X 指標「大於或小於」(k * 昨天的 Y 指標) (ex. K9 > K9 or OSC > OSC or 今收 < 1.08昨收) 並持續至少 N 天
 #  (indicator = 'k9', 'd9', 'dif', 'macd', 'osc', 'mean5', 'mean10', 'mean20', 'mean60', 'volume', '開盤', '收盤', '最高', '最低')
 def technical_indicator_greater_or_less_two_day_check_df(
     df, indicator_1="k9", indicator_2="k9", direction="more", threshold=1, days=1
 ):
-    return df.apply(
-        _technical_indicator_greater_or_less_two_day_check_row,
-        indicator_1=indicator_1,
-        indicator_2=indicator_2,
-        direction=direction,
-        threshold=threshold,
-        days=days,
-        axis=1,
+    return pd.Series(
+        technical_indicator_greater_or_less_two_day_check_np(
+            indicator_history_np(df, indicator_1, days + 1),
+            indicator_history_np(df, indicator_2, days + 1),
+            direction,
+            threshold,
+            days,
+        ),
+        index=df.index,
     )
 
 
-def _technical_indicator_greater_or_less_two_day_check_row(
-    row, indicator_1, indicator_2, direction, threshold, days
-) -> bool:
-    try:
-        if indicator_1 in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator_1 = [
-                each[1][indicator_1] for each in row["daily_k"][-1 : (-2 - days) : -1]
-            ]
-        else:
-            last_n_days_indicator_1 = [
-                each[1] for each in row[indicator_1][-1 : (-2 - days) : -1]
-            ]
-        if indicator_2 in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator_2 = [
-                each[1][indicator_2] for each in row["daily_k"][-1 : (-2 - days) : -1]
-            ]
-        else:
-            last_n_days_indicator_2 = [
-                each[1] for each in row[indicator_2][-1 : (-2 - days) : -1]
-            ]
-        if direction == "more":
-            return all(
-                last_n_days_indicator_1[i]
-                > (threshold * last_n_days_indicator_2[i + 1])
-                for i in range(days)
-            )
-        else:
-            return all(
-                last_n_days_indicator_1[i]
-                < (threshold * last_n_days_indicator_2[i + 1])
-                for i in range(days)
-            )
-    except:
-        return False
-
-
 # 8. (Public) (今天的 X 指標 - 今天的 Y 指標)「大於或小於」(k * 昨天的 Z 指標) (ex. (今高-今收) < (0.035*昨收)) 並持續至少 N 天
 #  (indicator = 'k9', 'd9', 'dif', 'macd', 'osc', 'mean5', 'mean10', 'mean20', 'mean60', 'volume', '開盤', '收盤', '最高', '最低')
 def technical_indicator_difference_two_day_check_df(
@@ -244,64 +138,19 @@ def technical_indicator_difference_two_day_check_df(
     indicator_3="收盤",
     days=1,
 ):
-    return df.apply(
-        _technical_indicator_difference_two_day_check_row,
-        indicator_1=indicator_1,
-        indicator_2=indicator_2,
-        direction=direction,
-        threshold=threshold,
-        indicator_3=indicator_3,
-        days=days,
-        axis=1,
+    return pd.Series(
+        technical_indicator_difference_two_day_check_np(
+            indicator_history_np(df, indicator_1, days + 1),
+            indicator_history_np(df, indicator_2, days + 1),
+            direction,
+            threshold,
+            indicator_history_np(df, indicator_3, days + 1),
+            days,
+        ),
+        index=df.index,
     )
 
 
-def _technical_indicator_difference_two_day_check_row(
-    row, indicator_1, indicator_2, direction, threshold, indicator_3, days
-) -> bool:
-    try:
-        if indicator_1 in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator_1 = [
-                each[1][indicator_1] for each in row["daily_k"][-1 : (-2 - days) : -1]
-            ]
-        else:
-            last_n_days_indicator_1 = [
-                each[1] for each in row[indicator_1][-1 : (-2 - days) : -1]
-            ]
-        if indicator_2 in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator_2 = [
-                each[1][indicator_2] for each in row["daily_k"][-1 : (-2 - days) : -1]
-            ]
-        else:
-            last_n_days_indicator_2 = [
-                each[1] for each in row[indicator_2][-1 : (-2 - days) : -1]
-            ]
-        if indicator_3 in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator_3 = [
-                each[1][indicator_3] for each in row["daily_k"][-1 : (-2 - days) : -1]
-            ]
-        else:
-            last_n_days_indicator_3 = [
-                each[1] for each in row[indicator_3][-1 : (-2 - days) : -1]
-            ]
-        difference_ = [
-            i_1 - i_2
-            for i_1, i_2 in zip(last_n_days_indicator_1, last_n_days_indicator_2)
-        ]
-        if direction == "more":
-            return all(
-                difference_[i] > (threshold * last_n_days_indicator_3[i + 1])
-                for i in range(days)
-            )
-        else:
-            return all(
-                difference_[i] < (threshold * last_n_days_indicator_3[i + 1])
-                for i in range(days)
-            )
-    except:
-        return False
-
-
 # 9. (Public) 今天的 X-Y 指標「大於等於」昨天的 X-Y 指標 (ex. 今天(k9-d9) >= 昨天(k9-d9)) 並持續至少 N 天
 #  (indicator = 'k9', 'd9', 'dif', 'macd', 'osc', 'mean5', 'mean10', 'mean20', 'mean60', 'volume', '開盤', '收盤', '最高', '最低')
 def technical_indicator_difference_greater_two_day_check_df(
@@ -393,75 +242,268 @@ def _golden_cross_check_row(row, indicator_1, indicator_2, days) -> bool:
 def technical_indicator_constant_check_df(
     df, indicator="k9", direction="more", threshold=20, days=1
 ):
-    return df.apply(
-        _technical_indicator_constant_check_row,
-        indicator=indicator,
-        direction=direction,
-        threshold=threshold,
-        days=days,
-        axis=1,
+    return pd.Series(
+        technical_indicator_constant_check_np(
+            indicator_history_np(df, indicator, days), direction, threshold, days
+        ),
+        index=df.index,
     )
 
 
-def _technical_indicator_constant_check_row(row, indicator, direction, threshold, days):
-    try:
-        if indicator in ["開盤", "收盤", "最高", "最低"]:
-            last_n_days_indicator = [
-                each[1][indicator] for each in row["daily_k"][-1 : (-1 - days) : -1]
-            ]
+##### 技術指標 (numpy 向量版) #####
+# 以下函式的輸入為 indicator_history_np 取得的 2-D masked array (股票數 × 天數)，最新一天在最後一欄。
+# 歷史不足的天數以 mask 標記為補位；資料中的 None 與抓取失敗的整列則是「未遮罩的 NaN」。
+# 與逐列版本相同：
+# * 「單日」比較 (2/5/6/11) 只檢查實際存在的天數 (補位略過)，視窗內有 None 即不符合，
+#   且最新一天必須有資料 (唯一差異：空的歷史 list 與抓取失敗相同，視為不符合)
+# * 「兩日」比較 (7/8) 需要完整 days + 1 天的資料，缺值即不符合
+
+
+class IndicatorHistory:
+    """
+    以欄為主 (SoA) 保存各指標歷史資料：每個指標一個 float64 masked array (股票數 × 天數)，
+    最新一天對齊最後一欄，不足的天數以 mask 標記。存放於 df.attrs["hist"]。
+    """
+
+    def __init__(self, index, arrays):
+        self.index = index
+        self.arrays = arrays
+
+    def __contains__(self, indicator):
+        return indicator in self.arrays
+
+    def __deepcopy__(self, memo):
+        # 內容不會被修改；pandas 傳遞 attrs 時會 deepcopy，這裡直接共用同一份矩陣
+        return self
+
+    def take(self, index, indicator, length=None):
+        """
+        依 index 取出對應股票最近 length 天的矩陣 (找不到的股票視為抓取失敗，整列為未遮罩的 NaN)
+        """
+        values = self.arrays[indicator]
+        if length is None:
+            length = values.shape[1]
+        positions = self.index.get_indexer(index)
+        found = positions >= 0
+        data = np.full((len(positions), length), np.nan, dtype=values.dtype)
+        padding = np.zeros((len(positions), length), dtype=bool)
+        padding[found] = True
+        width = min(length, values.shape[1])
+        if width > 0:
+            data[found, length - width:] = np.ma.getdata(values)[positions[found], -width:]
+            padding[found, length - width:] = np.ma.getmaskarray(values)[positions[found], -width:]
+        return np.ma.MaskedArray(data, padding)
+
+
+# (Public) 由 df 中以 list 儲存的歷史欄位建立 IndicatorHistory (daily_k 拆成開盤/最高/最低/收盤)
+def build_indicator_history(df, dtype=np.float64):
+    arrays = {}
+    for column in df.select_dtypes(include="object").columns:
+        if not df[column].map(lambda value: isinstance(value, list)).any():
+            continue
+        if column == "daily_k":
+            for price_type in ["開盤", "收盤", "最高", "最低"]:
+                arrays[price_type] = _indicator_history_from_lists(df, price_type, None, dtype)
         else:
-            last_n_days_indicator = [
-                each[1] for each in row[indicator][-1 : (-1 - days) : -1]
-            ]
-        if direction == "more":
-            return all(idx > threshold for idx in last_n_days_indicator)
-        else:
-            return all(idx < threshold for idx in last_n_days_indicator)
-    except:
-        return False
+            arrays[column] = _indicator_history_from_lists(df, column, None, dtype)
+    return IndicatorHistory(df.index, arrays)
+
+
+# (Public) 取得某指標最近 length 天 (None 表示全部) 的 2-D masked array；
+# 優先讀取 df.attrs["hist"]，否則由 list 欄位即時轉換
+def indicator_history_np(df, indicator="收盤", length=None):
+    history = df.attrs.get("hist")
+    if history is not None and indicator in history:
+        return history.take(df.index, indicator, length)
+    return _indicator_history_from_lists(df, indicator, length)
+
+
+def _indicator_history_from_lists(df, indicator, length, dtype=float):
+    is_price = indicator in ["開盤", "收盤", "最高", "最低"]
+    histories = df["daily_k" if is_price else indicator].to_numpy()
+    if length is None:
+        length = max(
+            (len(history) for history in histories if isinstance(history, list)),
+            default=0,
+        )
+    data = np.full((len(histories), length), np.nan, dtype=dtype)
+    padding = np.ones((len(histories), length), dtype=bool)
+    if length == 0:
+        return np.ma.MaskedArray(data, padding)
+    for i, history in enumerate(histories):
+        try:
+            last_n_days_data = history[-length:]
+            if is_price:
+                values = [each[1][indicator] for each in last_n_days_data]
+            else:
+                values = [each[1] for each in last_n_days_data]
+            # None 轉成 NaN，但不屬於補位
+            data[i, length - len(values):] = np.asarray(values, dtype=float)
+            padding[i, length - len(values):] = False
+        except:
+            # 抓取失敗：整列為未遮罩的 NaN，任何檢查皆不符合
+            data[i] = np.nan
+            padding[i] = False
+    return np.ma.MaskedArray(data, padding)
+
+
+def _window(indicator, start, stop=None):
+    # 取出視窗的數值 (None 為 NaN) 與補位遮罩；一般 ndarray 視為沒有補位
+    window = indicator[:, start:stop]
+    return np.ma.getdata(window), np.ma.getmaskarray(window)
+
+
+def _all_existing_days(condition, *paddings):
+    # 略過補位的天數後全部成立，且最新一天不是補位；None 與抓取失敗的 NaN 會讓 condition 為 False
+    if condition.shape[1] == 0:
+        return np.zeros(condition.shape[0], dtype=bool)
+    skipped = np.zeros(condition.shape, dtype=bool)
+    for padding in paddings:
+        skipped |= padding
+    return (condition | skipped).all(axis=1) & ~skipped[:, -1]
+
+
+# 2-np. 近 N 天成交量皆大於等於 X 「張」
+def volume_greater_check_np(volume, shares_threshold=500, days=1):
+    window, padding = _window(volume, -days)
+    return _all_existing_days(window >= shares_threshold, padding)
+
+
+# 5-np. 今天的 X 指標「大於或小於」(k * 今天的 Y 指標) 並持續至少 N 天
+def technical_indicator_greater_or_less_one_day_check_np(
+    indicator_1, indicator_2, direction="more", threshold=1, days=1
+):
+    window_1, padding_1 = _window(indicator_1, -days)
+    window_2, padding_2 = _window(indicator_2, -days)
+    window_2 = threshold * window_2
+    if direction == "more":
+        return _all_existing_days(window_1 > window_2, padding_1, padding_2)
+    return _all_existing_days(window_1 < window_2, padding_1, padding_2)
+
+
+# 6-np. 今天的 X 指標與今天的 Y 指標差距小於 Z 並持續至少 N 天
+def technical_indicator_difference_one_day_check_np(
+    indicator_1, indicator_2, difference_threshold=10, days=1
+):
+    window_1, padding_1 = _window(indicator_1, -days)
+    window_2, padding_2 = _window(indicator_2, -days)
+    difference_ = np.abs(window_1 - window_2)
+    return _all_existing_days(difference_ < difference_threshold, padding_1, padding_2)
+
+
+# 7-np. 今天的 X 指標「大於或小於」(k * 昨天的 Y 指標) 並持續至少 N 天
+def technical_indicator_greater_or_less_two_day_check_np(
+    indicator_1, indicator_2, direction="more", threshold=1, days=1
+):
+    window_1 = np.ma.getdata(indicator_1[:, -days:])
+    window_2 = threshold * np.ma.getdata(indicator_2[:, -1 - days:-1])
+    if direction == "more":
+        return (window_1 > window_2).all(axis=1)
+    return (window_1 < window_2).all(axis=1)
+
+
+# 8-np. (今天的 X 指標 - 今天的 Y 指標)「大於或小於」(k * 昨天的 Z 指標) 並持續至少 N 天
+def technical_indicator_difference_two_day_check_np(
+    indicator_1, indicator_2, direction="less", threshold=0.035, indicator_3=None, days=1
+):
+    indicator_3 = indicator_2 if indicator_3 is None else indicator_3
+    window_1, padding_1 = _window(indicator_1, -1 - days)
+    window_2, padding_2 = _window(indicator_2, -1 - days)
+    window_3 = threshold * np.ma.getdata(indicator_3[:, -1 - days:-1])
+    # 逐列版本會先算出 days + 1 天的差值，最舊那天若有 None 同樣不符合
+    oldest_valid = (
+        ~np.isnan(window_1[:, 0]) & ~np.isnan(window_2[:, 0])
+        | padding_1[:, 0] | padding_2[:, 0]
+    )
+    difference_ = window_1[:, 1:] - window_2[:, 1:]
+    if direction == "more":
+        return (difference_ > window_3).all(axis=1) & oldest_valid
+    return (difference_ < window_3).all(axis=1) & oldest_valid
+
+
+# 11-np. X 指標要小於或大於參數 k 並持續至少 N 天
+def technical_indicator_constant_check_np(indicator, direction="more", threshold=20, days=1):
+    window, padding = _window(indicator, -days)
+    if direction == "more":
+        return _all_existing_days(window > threshold, padding)
+    return _all_existing_days(window < threshold, padding)
 
 
 # 12. (Public) [twstock] 檢查該股票是否具備飆股特徵 (自定義長短線特徵)
 def skyrocket_check_df(df, n_days=10, k_change=0.20, consecutive_red_no_upper_shadow_days=2):
-    return df.apply(
-        _skyrocket_check_row,
-        n_days=n_days,
-        k_change=k_change,
-        consecutive_red_no_upper_shadow_days=consecutive_red_no_upper_shadow_days,
-        axis=1,
+    close = indicator_history_np(df, "收盤")
+    high = indicator_history_np(df, "最高")
+    return pd.Series(
+        skyrocket_check_np(
+            close, high, n_days, k_change, consecutive_red_no_upper_shadow_days
+        ),
+        index=df.index,
     )
-    
-    
-def _skyrocket_check_row(row, n_days, k_change, consecutive_red_no_upper_shadow_days):
-    try:
-        daily_k = row["daily_k"]
-        long_term_flag = _check_long_term_surge(daily_k, n_days, k_change)
-        short_term_flag = _check_short_term_surge(daily_k, consecutive_red_no_upper_shadow_days)
-        return long_term_flag and short_term_flag
-    except:
-        return False
 
 
-def _check_long_term_surge(daily_k, n_days, k_change):
-    # 檢查是否有在任意 n_days 內漲幅達 k_change
-    for i in range(len(daily_k) - n_days):
-        start_price = daily_k[i][1]["收盤"]
-        end_price = daily_k[i + n_days][1]["收盤"]
-        if (end_price - start_price) / start_price >= k_change:
-            return True
-    return False
+# 12-np. 同 12.，輸入為完整歷史的收盤價與最高價矩陣 (股票數 × 天數)
+# 逐列版本遇到 None 或 0 元會丟出例外而不符合，但迴圈先找到符合的天數就會提早結束，
+# 因此以「第一個符合的位置早於第一個例外的位置」模擬相同的結果
+def skyrocket_check_np(close, high, n_days=10, k_change=0.20, consecutive_red_no_upper_shadow_days=2):
+    padding = np.ma.getmaskarray(close)
+    close, high = np.ma.getdata(close), np.ma.getdata(high)
+    long_term_flag = _check_long_term_surge_np(close, padding, n_days, k_change)
+    short_term_flag = _check_short_term_surge_np(
+        close, high, padding, consecutive_red_no_upper_shadow_days
+    )
+    return long_term_flag & short_term_flag
+
 
+def _first_hit_before_error(hit, error):
+    # 每列依序掃描：第一個 hit 出現在第一個 error 之前才成立
+    n = hit.shape[1]
+    first_hit = np.where(hit.any(axis=1), hit.argmax(axis=1), n)
+    first_error = np.where(error.any(axis=1), error.argmax(axis=1), n)
+    return first_hit < first_error
 
-def _check_short_term_surge(daily_k, consecutive_red_no_upper_shadow_days):
+
+def _check_long_term_surge_np(close, padding, n_days, k_change):
+    # 檢查是否有在任意 n_days 內漲幅達 k_change
+    if close.shape[1] <= n_days:
+        return np.zeros(close.shape[0], dtype=bool)
+    start_price = close[:, :-n_days]
+    end_price = close[:, n_days:]
+    # 補位在左側，起始日有資料則結束日必定有資料
+    in_range = ~padding[:, :-n_days]
+    error = in_range & (np.isnan(start_price) | np.isnan(end_price) | (start_price == 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        surge = in_range & ~error & ((end_price - start_price) / start_price >= k_change)
+    return _first_hit_before_error(surge, error)
+
+
+def _check_short_term_surge_np(close, high, padding, consecutive_red_no_upper_shadow_days):
     # 檢查是否有在任意 consecutive_red_no_upper_shadow_days 內每天都漲幅大於 9% 且收在最高
-    for i in range(1, len(daily_k) - consecutive_red_no_upper_shadow_days + 1):
-        if all(
-            daily_k[j][1]["收盤"] == daily_k[j][1]["最高"] and
-            daily_k[j][1]["收盤"] / daily_k[j - 1][1]["收盤"] > 1.09
-            for j in range(i, i + consecutive_red_no_upper_shadow_days)
-        ):
-            return True
-    return False
+    days = consecutive_red_no_upper_shadow_days
+    if days == 0:
+        # 不要求連續天數時，只要有任一天資料即成立
+        return (~padding).any(axis=1)
+    width = close.shape[1] - 1
+    if width < days:
+        return np.zeros(close.shape[0], dtype=bool)
+    null = np.isnan(close) & ~padding
+    high_null = np.isnan(high) & ~padding
+    today, yesterday = close[:, 1:], close[:, :-1]
+    # 第 j 欄代表「今天 = j + 1、昨天 = j」，昨天有資料才在逐列版本的範圍內
+    in_range = ~padding[:, :-1]
+    # 逐列版本中 None == None 成立，接著的除法才會丟出例外
+    same_as_high = (today == high[:, 1:]) | (null[:, 1:] & high_null[:, 1:])
+    error = in_range & same_as_high & (null[:, 1:] | null[:, :-1] | (yesterday == 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        surge = in_range & same_as_high & ~error & (today / yesterday > 1.09)
+    # 每個視窗由起點依序檢查，停在第一個不成立的天數：超出視窗即成立，停在例外則不符合
+    columns = np.arange(width)
+    stop = np.where(surge, width, columns)
+    stop = np.minimum.accumulate(stop[:, ::-1], axis=1)[:, ::-1]
+    window_starts = in_range.copy()
+    window_starts[:, width - days + 1:] = False
+    hit = window_starts & (stop >= columns + days)
+    stop_error = np.take_along_axis(error, np.minimum(stop, width - 1), axis=1)
+    return _first_hit_before_error(hit, window_starts & ~hit & stop_error)
 
 
 # 13. (Public) [twstock] 檢查該股票 SAR 是否大於收盤價
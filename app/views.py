@@ -8,15 +8,15 @@
 * 於過濾流程中記錄每一支股票被排除的原因 (LOG)
 """
 
+import logging
 import datetime
+import numpy as np
 import pandas as pd
 from config import logger
 from flask import current_app
-from functools import partial
-from linebot.models import TextSendMessage
+from concurrent.futures import ThreadPoolExecutor
 from .strategies import technical, chip
-from .utils import is_weekday, df_mask_helper
-from .crawlers import get_twse_data, get_tpex_data, get_other_data, get_economic_events
+from .utils import is_weekday
 
 # =============================================================================
 # 全域參數（依需求自行調整）
@@ -47,82 +47,147 @@ STRAT3_ONE_DAY_GAIN_RATIO = 1.003   # 今日收盤 > 昨日收盤 * 1.003 (漲
 STRAT3_K9_LOWER_LIMIT = 15.0  # K9 > 15，代表 KD 指標 K 線需大於 15
 STRAT3_VOLUME_THRESHOLD = 200  # 當日成交量 > 200
 
+# ---- 共用 ----
+HISTORY_WINDOW_DAYS = 6  # 向量化檢查取用的最近天數（需 ≥ 各檢查 days + 1）
+
+# 推播訊息結尾署名（年份與版本由 config 帶入）
+_SIG_TEMPLATE = "\nNeil網路找來的🎶☀☘︎ © {year} ({ver})"
+
+# 最近一次計算完成的推薦清單（/update 重試同一日期時直接沿用）
+_LAST_WATCH_LISTS = {"date": None, "dfs": None}
+
 # =============================================================================
 # 主流程
 # =============================================================================
 
 
-def update_and_broadcast(app, target_date=None, need_broadcast=True):
+def update_and_broadcast(target_date=None, need_broadcast=True, force_refresh=False):
     """
     更新並推播推薦清單
+    （需在 app context 內呼叫，推播時透過 current_app 取得設定）
+    force_refresh=True 時忽略同日期的快取，重新下載資料並計算（用於資料晚發布時重跑）
     """
-    with app.app_context():
-        if not target_date:
-            target_date = datetime.date.today()
-        logger.info(f"資料日期 {str(target_date)}")
-        if not is_weekday(target_date):
-            logger.info("假日不進行更新與推播")
-            return
-
-        market_data_df = _update_market_data(target_date)
-        if market_data_df.shape[0] == 0:
+    if not target_date:
+        target_date = datetime.date.today()
+    logger.info("資料日期 %s", target_date)
+    if not is_weekday(target_date):
+        logger.info("假日不進行更新與推播")
+        return
+
+    watch_list_dfs = None if force_refresh else _get_cached_watch_lists(target_date)
+    if watch_list_dfs is None:
+        trading_df = _get_trading_data(target_date)
+        if trading_df.shape[0] == 0:
             logger.info("休市不進行更新與推播")
             return
 
-        logger.info("開始更新推薦清單")
-        watch_list_df_1 = _update_watch_list(
-            market_data_df, _get_strategy_1, strategy_name="策略1"
-        )
-        watch_list_df_3 = _update_watch_list(
-            market_data_df, _get_strategy_3, strategy_name="策略3"
-        )
-        watch_list_dfs = [watch_list_df_1, watch_list_df_3]
-        logger.info("推薦清單更新完成")
+    from .crawlers import get_economic_events
 
+    # 確認開市後才讀取經濟事件，與其他資料下載及策略計算並行，推播前再取回結果
+    start_date = (target_date + datetime.timedelta(days=1)
+                  ).strftime("%Y-%m-%d")
+    end_date = (target_date + datetime.timedelta(days=3)
+                ).strftime("%Y-%m-%d")
+    with ThreadPoolExecutor(max_workers=1) as events_executor:
         logger.info("開始讀取經濟事件")
-        start_date = (target_date + datetime.timedelta(days=1)
-                      ).strftime("%Y-%m-%d")
-        end_date = (target_date + datetime.timedelta(days=3)
-                    ).strftime("%Y-%m-%d")
-        economic_events = get_economic_events(start_date, end_date)
+        economic_events_future = events_executor.submit(
+            get_economic_events, start_date, end_date)
+
+        if watch_list_dfs is None:
+            watch_list_dfs = _get_watch_lists(target_date, trading_df)
+
+        economic_events = economic_events_future.result()
         logger.info("經濟事件讀取完成")
 
-        logger.info("開始進行好友推播")
-        _broadcast_watch_list(target_date, watch_list_dfs,
-                              economic_events, need_broadcast)
-        logger.info("好友推播執行完成")
+    logger.info("開始進行好友推播")
+    _broadcast_watch_list(target_date, watch_list_dfs,
+                          economic_events, need_broadcast)
+    logger.info("好友推播執行完成")
+
+
+def _get_cached_watch_lists(target_date):
+    """
+    同一資料日期重複觸發時，回傳上次計算完成的推薦清單；否則回傳 None
+    """
+    if _LAST_WATCH_LISTS["date"] != target_date:
+        return None
+    logger.info("沿用 %s 已計算的推薦清單", target_date)
+    return _LAST_WATCH_LISTS["dfs"]
+
+
+def _get_watch_lists(target_date, trading_df):
+    """
+    整合市場資料並計算各策略推薦清單，完成後記錄供同日期重試沿用
+    """
+    market_data_df = _update_market_data(target_date, trading_df)
+
+    logger.info("開始更新推薦清單")
+    # 兩個策略互不相依，平行計算（不使用 current_app，無需推入 app context）
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future_1 = executor.submit(
+            _update_watch_list, market_data_df, _get_strategy_1, "策略1"
+        )
+        future_3 = executor.submit(
+            _update_watch_list, market_data_df, _get_strategy_3, "策略3"
+        )
+        watch_list_dfs = [future_1.result(), future_3.result()]
+    logger.info("推薦清單更新完成")
+
+    # 清除 attrs，避免快取的清單透過 attrs["hist"] 持續引用整個市場的歷史矩陣
+    for watch_list_df in watch_list_dfs:
+        watch_list_df.attrs = {}
+    _LAST_WATCH_LISTS["date"] = target_date
+    _LAST_WATCH_LISTS["dfs"] = watch_list_dfs
+    return watch_list_dfs
 
 
 # =============================================================================
 # 取得並整合市場資料
 # =============================================================================
-def _update_market_data(target_date) -> pd.DataFrame:
+def _get_trading_data(target_date) -> pd.DataFrame:
     """
-    下載並合併台股 (TWSE/TPEX) 與其他延伸資料
+    平行下載台股 (TWSE/TPEX) 當日交易資料；休市時回傳空的 DataFrame
     """
-    twse_df = get_twse_data(target_date)
-    tpex_df = get_tpex_data(target_date)
-    market_data_df = pd.concat([twse_df, tpex_df])
+    from .crawlers import get_twse_data, get_tpex_data
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        twse_future = executor.submit(get_twse_data, target_date)
+        tpex_future = executor.submit(get_tpex_data, target_date)
+        return pd.concat([twse_future.result(), tpex_future.result()])
 
-    if market_data_df.shape[0] == 0:
-        return market_data_df
+
+def _update_market_data(target_date, trading_df) -> pd.DataFrame:
+    """
+    下載其他延伸資料並與台股交易資料合併
+    （其他資料需逐檔抓取技術指標，僅在確認開市後才下載）
+    """
+    from .crawlers import get_other_data
 
     other_df = get_other_data(target_date)
-    market_data_df = pd.merge(
-        other_df,
-        market_data_df,
-        how="left",
-        on=["代號", "名稱", "股票類型"],
-    ).sort_index()
+
+    # 兩邊皆以「代號」為索引，補上 名稱/股票類型 組成複合索引後直接 join，
+    # 省去 merge 重建雜湊表與複製整份資料
+    key = ["名稱", "股票類型"]
+    market_data_df = (
+        other_df.set_index(key, append=True)
+        .join(trading_df.set_index(key, append=True), how="left")
+        .reset_index(key)
+        .sort_index()
+    )
+
+    # 將 list 形式的歷史欄位轉為 float64 矩陣，供技術面檢查直接取用
+    market_data_df.attrs["hist"] = technical.build_indicator_history(
+        market_data_df)
 
     # 顯示台積電資料作 sanity check
-    logger.info(f"核對 [2330 台積電] {target_date} 交易資訊")
+    logger.info("核對 [2330 台積電] %s 交易資訊", target_date)
     tsmc = market_data_df.loc["2330"]
     for column, value in tsmc.items():
         if isinstance(value, list) and len(value) > 0:
-            logger.info(f"{column}: {value[-1]} (history length={len(value)})")
+            logger.info("%s: %s (history length=%d)",
+                        column, value[-1], len(value))
         else:
-            logger.info(f"{column}: {value}")
+            logger.info("%s: %s", column, value)
     return market_data_df
 
 
@@ -136,12 +201,19 @@ def _update_watch_list(market_data_df: pd.DataFrame,
     """
     根據指定策略過濾股票，回傳推薦清單並記錄排除原因
     """
-    logger.info(f"{strategy_name} | 原始股票數量: {market_data_df.shape[0]}")
-    fundamental_mask, technical_mask, chip_mask = strategy_func(market_data_df)
-
-    # 合併所有條件
-    combined_mask = fundamental_mask + technical_mask + chip_mask
-    watch_list_df = df_mask_helper(market_data_df, combined_mask)
+    logger.info("%s | 原始股票數量: %d", strategy_name, market_data_df.shape[0])
+    combined_mask = strategy_func(market_data_df)
+
+    # 合併所有條件：堆疊成 (條件數 × 股票數) 的布林矩陣，一次完成 AND
+    if combined_mask:
+        mask_matrix = np.stack([
+            m.reindex(market_data_df.index).fillna(False).to_numpy(dtype=bool)
+            for m in combined_mask
+        ])
+    else:
+        mask_matrix = np.ones((0, market_data_df.shape[0]), dtype=bool)
+    passed = mask_matrix.all(axis=0)
+    watch_list_df = market_data_df.loc[passed]
 
     # 依產業別排序
     watch_list_df = watch_list_df.sort_values(by=["產業別"], ascending=False)
@@ -153,239 +225,290 @@ def _update_watch_list(market_data_df: pd.DataFrame,
                 func)]
 
     # ---- 產生排除原因 LOG ----
-    excluded = market_data_df.index.difference(watch_list_df.index)
-    # 建立每個條件對應名稱 (方便閱讀)
-    condition_names = [f"條件{i+1}" for i in range(len(combined_mask))]
-
-    for stock_id in excluded:
-        failed_conditions = []
-        for cond_name, cond_mask in zip(condition_names, combined_mask):
-            # 若該股票在該條件下為 False，代表未通過
-            if not cond_mask.get(stock_id, True):
-                failed_conditions.append(cond_name)
-        logger.info(
-            f"{strategy_name} | {stock_id} 被排除原因: {', '.join(failed_conditions)}")
-
-    logger.info(f"{strategy_name} | 通過股票數量: {watch_list_df.shape[0]}")
+    # 彙整成單一訊息一次寫出；INFO 未啟用時整段略過
+    if logger.isEnabledFor(logging.INFO):
+        # 建立每個條件對應名稱 (方便閱讀)
+        condition_names = [
+            m.name if m.name is not None else f"條件{i+1}"
+            for i, m in enumerate(combined_mask)
+        ]
+        cond_names_arr = np.array(condition_names)
+        # 以位置索引取出被排除的股票，直接從條件矩陣讀出未通過的條件
+        excluded_idx = np.where(
+            ~market_data_df.index.isin(watch_list_df.index))[0]
+        lines = []
+        for i in excluded_idx:
+            failed_conditions = cond_names_arr[~mask_matrix[:, i]].tolist()
+            lines.append(
+                f"{market_data_df.index[i]} 被排除原因: "
+                f"{', '.join(failed_conditions) or '其他篩選'}")
+        if lines:
+            logger.info("%s | 排除明細:\n%s", strategy_name, "\n".join(lines))
+
+    logger.info("%s | 通過股票數量: %d", strategy_name, watch_list_df.shape[0])
     return watch_list_df
 
 
 # =============================================================================
 # 各策略條件
 # =============================================================================
-def _get_strategy_1(market_data_df) -> tuple:
+def _prepare_arrays(market_data_df, names, length=HISTORY_WINDOW_DAYS) -> dict:
     """
+    將策略會用到的歷史指標一次轉成 2-D ndarray (股票數 × 天數)，供所有檢查共用
+    """
+    return {
+        name: technical.indicator_history_np(market_data_df, name, length)
+        for name in names
+    }
+
 
+def _evaluate_checks(market_data_df, checks) -> list:
     """
-    fundamental_mask = [
-        # 營收成長至少其中一項 > 0%
-        (market_data_df["(月)營收月增率(%)"] > 0) |
-        (market_data_df["(月)營收年增率(%)"] > 0) |
-        (market_data_df["(月)累積營收年增率(%)"] > 0),
-    ]
+    依序執行 checks = [(條件名稱, 檢查函式), ...]，每一關只對仍存活的股票計算
+    * 檢查函式接收存活股票的位置索引，回傳對應的布林陣列
+    * 回傳每個條件的完整布林 Series；被排除的股票只在淘汰它的那一關為 False，
+      之後未評估的條件一律視為通過
+    """
+    n_stocks = market_data_df.shape[0]
+    alive = np.arange(n_stocks)
+    masks = []
+    for name, check in checks:
+        mask = np.ones(n_stocks, dtype=bool)
+        if alive.size > 0:
+            passed = np.asarray(check(alive), dtype=bool)
+            mask[alive] = passed
+            alive = alive[passed]
+        masks.append(pd.Series(mask, index=market_data_df.index, name=name))
+    return masks
+
+
+def _revenue_growth_mask(market_data_df) -> pd.Series:
+    """
+    營收成長至少其中一項 > 0%（月增率 / 年增率 / 累積年增率）
+    """
+    growth = np.stack([
+        market_data_df[column].to_numpy(dtype=float, na_value=np.nan)
+        for column in ("(月)營收月增率(%)", "(月)營收年增率(%)", "(月)累積營收年增率(%)")
+    ])
+    return pd.Series((growth > 0).any(axis=0), index=market_data_df.index)
+
 
-    technical_mask = [
+def _get_strategy_1(market_data_df) -> list:
+    """
+    條件依篩選力與計算成本排序：便宜且淘汰多的放前面，飆股檢查放最後
+    """
+    h = _prepare_arrays(market_data_df, [
+        "收盤", "開盤", "最高", "mean5", "mean20", "mean60", "k9", "d9", "j9",
+        "volume", "mean_5_volume", "mean_20_volume",
+    ])
+    full = _prepare_arrays(market_data_df, ["收盤", "最高"], length=None)
+    revenue_growth = _revenue_growth_mask(market_data_df).to_numpy()
+    foreign_buy = chip.foreign_buy_positive_check_df(
+        market_data_df, threshold=0).to_numpy()
+
+    checks = [
         # 收盤價 > STRAT1_MIN_CLOSE_PRICE
-        technical.technical_indicator_constant_check_df(
-            market_data_df, "收盤", "more", STRAT1_MIN_CLOSE_PRICE, days=1
-        ),
+        ("收盤價門檻", lambda pos: technical.technical_indicator_constant_check_np(
+            h["收盤"][pos], "more", STRAT1_MIN_CLOSE_PRICE, days=1
+        )),
+        # 成交量 > STRAT1_VOLUME_THRESHOLD
+        ("成交量門檻", lambda pos: technical.volume_greater_check_np(
+            h["volume"][pos], shares_threshold=STRAT1_VOLUME_THRESHOLD, days=1
+        )),
+        # 20 日均量 > STRAT1_MEAN20_VOLUME_THRESHOLD
+        ("20日均量門檻", lambda pos: technical.technical_indicator_constant_check_np(
+            h["mean_20_volume"][pos], "more", STRAT1_MEAN20_VOLUME_THRESHOLD, days=1
+        )),
+        # 5 日均量 > STRAT1_MEAN5_VOLUME_THRESHOLD
+        ("5日均量門檻", lambda pos: technical.technical_indicator_constant_check_np(
+            h["mean_5_volume"][pos], "more", STRAT1_MEAN5_VOLUME_THRESHOLD, days=1
+        )),
+        # 營收成長至少其中一項 > 0%
+        ("營收成長", lambda pos: revenue_growth[pos]),
+        # 外資買超 >= 0
+        ("外資買超", lambda pos: foreign_buy[pos]),
+        # 收盤價 > STRAT1_RED_K_RATIO * 開盤價
+        ("紅K", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["收盤"][pos], h["開盤"][pos], "more", STRAT1_RED_K_RATIO, days=1
+        )),
+        # 今天收盤 > 昨日收盤 * STRAT1_TWO_DAY_GAIN_RATIO
+        ("今日漲幅", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["收盤"][pos], h["收盤"][pos], "more", STRAT1_TWO_DAY_GAIN_RATIO, days=1
+        )),
+        # 今天成交量 > 昨天成交量
+        ("量增", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["volume"][pos], h["volume"][pos], "more", 1, days=1
+        )),
+        # 今天成交量 > 5 日均量
+        ("量大於5日均量", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["volume"][pos], h["mean_5_volume"][pos], "more", 1, days=1
+        )),
+        # 「今天 5 日均量」> 「昨天 5 日均量」
+        ("5日均量上升", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["mean_5_volume"][pos], h["mean_5_volume"][pos], "more", 1, days=1
+        )),
         # MA1 > MA5
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "收盤", "mean5", "more", 1, days=1
-        ),
+        ("MA1>MA5", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["收盤"][pos], h["mean5"][pos], "more", 1, days=1
+        )),
         # MA5 > MA20
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "mean5", "mean20", "more", 1, days=1
-        ),
+        ("MA5>MA20", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["mean5"][pos], h["mean20"][pos], "more", 1, days=1
+        )),
         # MA20 > MA60
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "mean20", "mean60", "more", 1, days=1
-        ),
-        # 收盤價 > STRAT1_RED_K_RATIO * 開盤價
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "收盤", "開盤", "more", STRAT1_RED_K_RATIO, days=1
-        ),
+        ("MA20>MA60", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["mean20"][pos], h["mean60"][pos], "more", 1, days=1
+        )),
         # 今天收盤 > 昨日最高 * STRAT1_BREAK_HIGH_RATIO
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "收盤", "最高", "more", STRAT1_BREAK_HIGH_RATIO, days=1
-        ),
+        ("突破昨高", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["收盤"][pos], h["最高"][pos], "more", STRAT1_BREAK_HIGH_RATIO, days=1
+        )),
         # K9 向上
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "k9", "k9", "more", 1, days=1
-        ),
+        ("K9向上", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["k9"][pos], h["k9"][pos], "more", 1, days=1
+        )),
         # D9 < 90
-        technical.technical_indicator_constant_check_df(
-            market_data_df, "d9", "less", 90, days=1
-        ),
+        ("D9<90", lambda pos: technical.technical_indicator_constant_check_np(
+            h["d9"][pos], "less", 90, days=1
+        )),
         # |K9 - D9| < STRAT1_K9_DIFF_THRESHOLD
-        technical.technical_indicator_difference_one_day_check_df(
-            market_data_df, "k9", "d9", STRAT1_K9_DIFF_THRESHOLD, days=1
-        ),
+        ("KD差距", lambda pos: technical.technical_indicator_difference_one_day_check_np(
+            h["k9"][pos], h["d9"][pos], STRAT1_K9_DIFF_THRESHOLD, days=1
+        )),
         # J9 < STRAT1_J9_UPPER_LIMIT
-        technical.technical_indicator_constant_check_df(
-            market_data_df, "j9", "less", STRAT1_J9_UPPER_LIMIT, days=1
-        ),
-        # 今天收盤 > 昨日收盤 * STRAT1_TWO_DAY_GAIN_RATIO
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "收盤", "收盤", "more", STRAT1_TWO_DAY_GAIN_RATIO, days=1
-        ),
+        ("J9上限", lambda pos: technical.technical_indicator_constant_check_np(
+            h["j9"][pos], "less", STRAT1_J9_UPPER_LIMIT, days=1
+        )),
         # 不能連續兩天漲幅都超過 STRAT1_LIMIT_UP_RATIO
-        ~technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "收盤", "收盤", "more", STRAT1_LIMIT_UP_RATIO, days=2
-        ),
+        ("非連續大漲", lambda pos: ~technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["收盤"][pos], h["收盤"][pos], "more", STRAT1_LIMIT_UP_RATIO, days=2
+        )),
         # 上影線長度 < STRAT1_UPPER_SHADOW_THRESHOLD * 昨收
-        technical.technical_indicator_difference_two_day_check_df(
-            market_data_df, "最高", "收盤", "less", STRAT1_UPPER_SHADOW_THRESHOLD, "收盤", days=1
-        ),
+        ("上影線", lambda pos: technical.technical_indicator_difference_two_day_check_np(
+            h["最高"][pos], h["收盤"][pos], "less", STRAT1_UPPER_SHADOW_THRESHOLD, h["收盤"][pos], days=1
+        )),
         # 滿足飆股條件
-        technical.skyrocket_check_df(
-            market_data_df,
+        ("飆股", lambda pos: technical.skyrocket_check_np(
+            full["收盤"][pos],
+            full["最高"][pos],
             n_days=STRAT1_SKYROCKET_N_DAYS,
             k_change=STRAT1_SKYROCKET_K_CHANGE,
             consecutive_red_no_upper_shadow_days=1,
-        ),
+        )),
     ]
-
-    chip_mask = [
-        # 成交量 > STRAT1_VOLUME_THRESHOLD
-        technical.volume_greater_check_df(
-            market_data_df, shares_threshold=STRAT1_VOLUME_THRESHOLD, days=1
-        ),
-        # 今天成交量 > 昨天成交量
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "volume", "volume", "more", 1, days=1
-        ),
-        # 今天成交量 > 5 日均量
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "volume", "mean_5_volume", "more", 1, days=1
-        ),
-        # 5 日均量 > STRAT1_MEAN5_VOLUME_THRESHOLD
-        technical.technical_indicator_constant_check_df(
-            market_data_df, "mean_5_volume", "more", STRAT1_MEAN5_VOLUME_THRESHOLD, days=1
-        ),
-        # 20 日均量 > STRAT1_MEAN20_VOLUME_THRESHOLD
-        technical.technical_indicator_constant_check_df(
-            market_data_df, "mean_20_volume", "more", STRAT1_MEAN20_VOLUME_THRESHOLD, days=1
-        ),
-        # 「今天 5 日均量」> 「昨天 5 日均量」
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "mean_5_volume", "mean_5_volume", "more", 1, days=1
-        ),
-        # 外資買超 >= 0
-        chip.foreign_buy_positive_check_df(market_data_df, threshold=0),
-    ]
-    return fundamental_mask, technical_mask, chip_mask
+    return _evaluate_checks(market_data_df, checks)
 
 
-def _get_strategy_2(market_data_df) -> tuple:
+def _get_strategy_2(market_data_df) -> list:
     """
     策略 2：動能 + 均線多頭
     （僅示範抽參數，演算法維持不變）
     """
-    fundamental_mask = [
-        (market_data_df["(月)營收月增率(%)"] > 0) |
-        (market_data_df["(月)營收年增率(%)"] > 0) |
-        (market_data_df["(月)累積營收年增率(%)"] > 0),
+    h = _prepare_arrays(market_data_df, [
+        "收盤", "mean5", "mean20", "mean60", "k9", "d9", "j9", "osc",
+        "volume", "mean_5_volume",
+    ])
+    revenue_growth = _revenue_growth_mask(market_data_df).to_numpy()
+
+    checks = [
+        ("收盤價門檻", lambda pos: technical.technical_indicator_constant_check_np(
+            h["收盤"][pos], "more", STRAT2_MIN_CLOSE_PRICE, days=1
+        )),
+        ("成交量門檻", lambda pos: technical.volume_greater_check_np(
+            h["volume"][pos], shares_threshold=STRAT2_VOLUME_THRESHOLD, days=1
+        )),
+        ("營收成長", lambda pos: revenue_growth[pos]),
+        ("量增", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["volume"][pos], h["volume"][pos], "more", 1, days=1
+        )),
+        ("量大於5日均量", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["volume"][pos], h["mean_5_volume"][pos], "more", 1, days=1
+        )),
+        ("MA1>MA5", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["收盤"][pos], h["mean5"][pos], "more", 1, days=1
+        )),
+        ("MA1>MA20", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["收盤"][pos], h["mean20"][pos], "more", 1, days=1
+        )),
+        ("MA60向上", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["mean60"][pos], h["mean60"][pos], "more", 1, days=1
+        )),
+        ("K9>D9", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["k9"][pos], h["d9"][pos], "more", 1, days=1
+        )),
+        ("J9向上", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["j9"][pos], h["j9"][pos], "more", 1, days=1
+        )),
+        ("OSC向上", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["osc"][pos], h["osc"][pos], "more", 1, days=1
+        )),
+        ("J9上限", lambda pos: technical.technical_indicator_constant_check_np(
+            h["j9"][pos], "less", STRAT2_J9_UPPER_LIMIT, days=1
+        )),
     ]
-
-    technical_mask = [
-        technical.technical_indicator_constant_check_df(
-            market_data_df, "收盤", "more", STRAT2_MIN_CLOSE_PRICE, days=1
-        ),
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "收盤", "mean5", "more", 1, days=1
-        ),
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "收盤", "mean20", "more", 1, days=1
-        ),
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "mean60", "mean60", "more", 1, days=1
-        ),
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "k9", "d9", "more", 1, days=1
-        ),
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "j9", "j9", "more", 1, days=1
-        ),
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "osc", "osc", "more", 1, days=1
-        ),
-        technical.technical_indicator_constant_check_df(
-            market_data_df, "j9", "less", STRAT2_J9_UPPER_LIMIT, days=1
-        ),
-    ]
-
-    chip_mask = [
-        technical.volume_greater_check_df(
-            market_data_df, shares_threshold=STRAT2_VOLUME_THRESHOLD, days=1
-        ),
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "volume", "volume", "more", 1, days=1
-        ),
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "volume", "mean_5_volume", "more", 1, days=1
-        ),
-    ]
-    return fundamental_mask, technical_mask, chip_mask
+    return _evaluate_checks(market_data_df, checks)
 
 
-def _get_strategy_3(market_data_df) -> tuple:
+def _get_strategy_3(market_data_df) -> list:
     """
-  
+    條件依篩選力與計算成本排序，飆股檢查放最後
     """
-    fundamental_mask = []
-
-    technical_mask = [
-        technical.technical_indicator_constant_check_df(
-            market_data_df, "收盤", "more", STRAT3_MIN_CLOSE_PRICE, days=1
-        ),
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "收盤", "收盤", "more", STRAT3_ONE_DAY_GAIN_RATIO, days=1
-        ),
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "收盤", "開盤", "more", 1, days=1
-        ),
-        technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "收盤", "mean60", "more", 1, days=1
-        ),
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "mean20", "mean20", "more", 1, days=1
-        ),
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "mean60", "mean60", "more", 1, days=1
-        ),
-        # 五天內最低價曾經跌到 MA20 以下
-        ~technical.technical_indicator_greater_or_less_one_day_check_df(
-            market_data_df, "最低", "mean20", "more", 1, days=5
-        ),
+    h = _prepare_arrays(market_data_df, [
+        "收盤", "開盤", "最低", "mean20", "mean60", "k9", "volume",
+    ])
+    full = _prepare_arrays(market_data_df, ["收盤", "最高"], length=None)
+    foreign_buy = chip.foreign_buy_positive_check_df(
+        market_data_df, threshold=0).to_numpy()
+
+    checks = [
+        ("收盤價門檻", lambda pos: technical.technical_indicator_constant_check_np(
+            h["收盤"][pos], "more", STRAT3_MIN_CLOSE_PRICE, days=1
+        )),
+        ("成交量門檻", lambda pos: technical.volume_greater_check_np(
+            h["volume"][pos], shares_threshold=STRAT3_VOLUME_THRESHOLD, days=1
+        )),
+        ("外資買超", lambda pos: foreign_buy[pos]),
+        ("今日漲幅", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["收盤"][pos], h["收盤"][pos], "more", STRAT3_ONE_DAY_GAIN_RATIO, days=1
+        )),
         # 昨天下跌
-        ~technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "收盤", "收盤", "more", 1, days=2
-        ),
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "k9", "k9", "more", 1, days=1
-        ),
-        technical.technical_indicator_constant_check_df(
-            market_data_df, "k9", "more", STRAT3_K9_LOWER_LIMIT, days=1
-        ),
-        technical.skyrocket_check_df(
-            market_data_df,
+        ("昨日下跌", lambda pos: ~technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["收盤"][pos], h["收盤"][pos], "more", 1, days=2
+        )),
+        ("量縮", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["volume"][pos], h["volume"][pos], "less", 1, days=1
+        )),
+        ("紅K", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["收盤"][pos], h["開盤"][pos], "more", 1, days=1
+        )),
+        ("收盤>MA60", lambda pos: technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["收盤"][pos], h["mean60"][pos], "more", 1, days=1
+        )),
+        ("MA20向上", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["mean20"][pos], h["mean20"][pos], "more", 1, days=1
+        )),
+        ("MA60向上", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["mean60"][pos], h["mean60"][pos], "more", 1, days=1
+        )),
+        # 五天內最低價曾經跌到 MA20 以下
+        ("回測MA20", lambda pos: ~technical.technical_indicator_greater_or_less_one_day_check_np(
+            h["最低"][pos], h["mean20"][pos], "more", 1, days=5
+        )),
+        ("K9向上", lambda pos: technical.technical_indicator_greater_or_less_two_day_check_np(
+            h["k9"][pos], h["k9"][pos], "more", 1, days=1
+        )),
+        ("K9下限", lambda pos: technical.technical_indicator_constant_check_np(
+            h["k9"][pos], "more", STRAT3_K9_LOWER_LIMIT, days=1
+        )),
+        ("飆股", lambda pos: technical.skyrocket_check_np(
+            full["收盤"][pos],
+            full["最高"][pos],
             n_days=STRAT1_SKYROCKET_N_DAYS,  # 與策略1 共用飆股參數
             k_change=STRAT1_SKYROCKET_K_CHANGE,
             consecutive_red_no_upper_shadow_days=0,
-        ),
-    ]
-
-    chip_mask = [
-        technical.volume_greater_check_df(
-            market_data_df, shares_threshold=STRAT3_VOLUME_THRESHOLD, days=1
-        ),
-        technical.technical_indicator_greater_or_less_two_day_check_df(
-            market_data_df, "volume", "volume", "less", 1, days=1
-        ),
-        chip.foreign_buy_positive_check_df(market_data_df, threshold=0),
+        )),
     ]
-    return fundamental_mask, technical_mask, chip_mask
+    return _evaluate_checks(market_data_df, checks)
 
 
 # =============================================================================
@@ -395,34 +518,38 @@ def _broadcast_watch_list(target_date, watch_list_dfs, economic_events, need_bro
     """
     整理推播文字並以 LINE Bot 推送
     """
-    final_recommendation_text = ""
+    # 以 list 收集片段，最後一次 join，避免字串反覆 += 造成 O(N²) 複製
+    parts = []
     for i, watch_list_df in enumerate(watch_list_dfs):
         if watch_list_df.empty:
-            final_recommendation_text += f"🔎 [策略{i+1}] 無推薦股票\n"
-            logger.info(f"[策略{i+1}] 無推薦股票")
+            parts.append(f"🔎 [策略{i+1}] 無推薦股票\n")
+            logger.info("[策略%d] 無推薦股票", i + 1)
         else:
-            final_recommendation_text += (
-                f"🔎 [策略{i+1}] 股票有 {len(watch_list_df)} 檔\n"
-                + "\n###########\n\n"
-            )
-            logger.info(f"[策略{i+1}] 股票有 {len(watch_list_df)} 檔")
-            for stock_id, v in watch_list_df.iterrows():
-                final_recommendation_text += f"{stock_id} {v['名稱']}  {v['產業別']}\n"
-                logger.info(f"{stock_id} {v['名稱']}  {v['產業別']}")
-        final_recommendation_text += "\n###########\n\n"
+            parts.append(f"🔎 [策略{i+1}] 股票有 {len(watch_list_df)} 檔\n")
+            parts.append("\n###########\n\n")
+            logger.info("[策略%d] 股票有 %d 檔", i + 1, len(watch_list_df))
+            names = watch_list_df["名稱"].to_numpy()
+            industries = watch_list_df["產業別"].to_numpy()
+            for stock_id, name, industry in zip(watch_list_df.index, names, industries):
+                parts.append(f"{stock_id} {name}  {industry}\n")
+                logger.info("%s %s  %s", stock_id, name, industry)
+        parts.append("\n###########\n\n")
 
     if economic_events:
-        final_recommendation_text += "📆 預計經濟事件\n###########\n\n"
+        parts.append("📆 預計經濟事件\n###########\n\n")
         logger.info("預計經濟事件")
         for event in economic_events:
-            final_recommendation_text += f"{event['date']} - {event['country']} - {event['title']}\n"
-            logger.info(
-                f"{event['date']} - {event['country']} - {event['title']}")
-        final_recommendation_text += "\n###########\n\n"
+            parts.append(f"{event['date']} - {event['country']} - {event['title']}\n")
+            logger.info("%s - %s - %s",
+                        event['date'], event['country'], event['title'])
+        parts.append("\n###########\n\n")
 
-    final_recommendation_text += f"資料來源: 台股 {str(target_date)}"
-    final_recommendation_text += f"\nNeil網路找來的🎶☀☘︎ © {current_app.config['YEAR']} ({current_app.config['VERSION']})"
+    parts.append(f"資料來源: 台股 {str(target_date)}")
+    parts.append(_SIG_TEMPLATE.format(
+        year=current_app.config["YEAR"], ver=current_app.config["VERSION"]))
+    final_recommendation_text = "".join(parts)
 
     if need_broadcast:
+        from linebot.models import TextSendMessage
         line_bot_api = current_app.config['LINE_BOT_API']
         line_bot_api.broadcast(TextSendMessage(text=final_recommendation_text))
@@ -44,6 +44,8 @@ def main():
     ap.add_argument("--date", help="Target date YYYY-MM-DD")
     ap.add_argument("--broadcast", action="store_true",
                     help="Really push to LINE")
+    ap.add_argument("--force-refresh", action="store_true",
+                    help="Ignore watch lists cached for the same date")
     args = ap.parse_args()
 
     print("=== Wakeup ===")
@@ -57,6 +59,8 @@ def main():
     }
     if args.date:
         headers["Target-Date"] = args.date
+    if args.force_refresh:
+        headers["Force-Refresh"] = "true"
     resp = call_api("GET", "/update", headers=headers)
     print("Status:", pretty(resp.status_code))
     try:
@@ -0,0 +1,323 @@
+"""
+technical.py 向量化檢查與重構前逐列版本的一致性測試
+"""
+
+import os
+import random
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+os.environ.setdefault("CHANNEL_ACCESS_TOKEN", "test")
+os.environ.setdefault("CHANNEL_SECRET", "test")
+
+from app.strategies import technical  # noqa: E402
+
+PRICE_TYPES = ["開盤", "收盤", "最高", "最低"]
+INDICATORS = ["k9", "d9", "mean5", "volume"]
+
+
+# =============================================================================
+# 重構前的逐列版本 (參考實作)
+# =============================================================================
+def _last(row, indicator, n):
+    if indicator in PRICE_TYPES:
+        return [each[1][indicator] for each in row["daily_k"][-1:(-1 - n):-1]]
+    return [each[1] for each in row[indicator][-1:(-1 - n):-1]]
+
+
+def _volume_greater_row(row, shares_threshold, days):
+    try:
+        return all(v >= shares_threshold for v in _last(row, "volume", days))
+    except:
+        return False
+
+
+def _one_day_row(row, indicator_1, indicator_2, direction, threshold, days):
+    try:
+        pairs = zip(_last(row, indicator_1, days), _last(row, indicator_2, days))
+        if direction == "more":
+            return all(i_1 > (threshold * i_2) for i_1, i_2 in pairs)
+        return all(i_1 < (threshold * i_2) for i_1, i_2 in pairs)
+    except:
+        return False
+
+
+def _difference_one_day_row(row, indicator_1, indicator_2, difference_threshold, days):
+    try:
+        pairs = zip(_last(row, indicator_1, days), _last(row, indicator_2, days))
+        return all(abs(i_1 - i_2) < difference_threshold for i_1, i_2 in pairs)
+    except:
+        return False
+
+
+def _two_day_row(row, indicator_1, indicator_2, direction, threshold, days):
+    try:
+        list_1 = _last(row, indicator_1, days + 1)
+        list_2 = _last(row, indicator_2, days + 1)
+        if direction == "more":
+            return all(list_1[i] > (threshold * list_2[i + 1]) for i in range(days))
+        return all(list_1[i] < (threshold * list_2[i + 1]) for i in range(days))
+    except:
+        return False
+
+
+def _difference_two_day_row(row, indicator_1, indicator_2, direction, threshold, indicator_3, days):
+    try:
+        list_3 = _last(row, indicator_3, days + 1)
+        difference_ = [
+            i_1 - i_2
+            for i_1, i_2 in zip(_last(row, indicator_1, days + 1), _last(row, indicator_2, days + 1))
+        ]
+        if direction == "more":
+            return all(difference_[i] > (threshold * list_3[i + 1]) for i in range(days))
+        return all(difference_[i] < (threshold * list_3[i + 1]) for i in range(days))
+    except:
+        return False
+
+
+def _constant_row(row, indicator, direction, threshold, days):
+    try:
+        values = _last(row, indicator, days)
+        if direction == "more":
+            return all(v > threshold for v in values)
+        return all(v < threshold for v in values)
+    except:
+        return False
+
+
+def _skyrocket_row(row, n_days, k_change, consecutive_red_no_upper_shadow_days):
+    try:
+        daily_k = row["daily_k"]
+        long_term_flag = False
+        for i in range(len(daily_k) - n_days):
+            start_price = daily_k[i][1]["收盤"]
+            end_price = daily_k[i + n_days][1]["收盤"]
+            if (end_price - start_price) / start_price >= k_change:
+                long_term_flag = True
+                break
+        short_term_flag = False
+        days = consecutive_red_no_upper_shadow_days
+        for i in range(1, len(daily_k) - days + 1):
+            if all(
+                daily_k[j][1]["收盤"] == daily_k[j][1]["最高"] and
+                daily_k[j][1]["收盤"] / daily_k[j - 1][1]["收盤"] > 1.09
+                for j in range(i, i + days)
+            ):
+                short_term_flag = True
+                break
+        return long_term_flag and short_term_flag
+    except:
+        return False
+
+
+# =============================================================================
+# 測試資料
+# =============================================================================
+def _random_history(rng, length, base, nulls=True):
+    start = datetime.date(2025, 1, 1)
+    return [
+        [
+            start + datetime.timedelta(days=i),
+            # 偶爾出現 None (例如指標尚未算出)
+            None if nulls and rng.random() < 0.05 else round(base * rng.uniform(0.9, 1.15), 2),
+        ]
+        for i in range(length)
+    ]
+
+
+def _random_daily_k(rng, length, nulls=True):
+    start = datetime.date(2025, 1, 1)
+    close = 30.0
+    daily_k = []
+    for i in range(length):
+        # 偶爾製造收在最高的大漲日，讓飆股條件有機會成立
+        if rng.random() < 0.15:
+            close = round(close * 1.1, 2)
+            high = close
+        else:
+            close = round(close * rng.uniform(0.95, 1.06), 2)
+            high = round(close * rng.uniform(1.0, 1.03), 2)
+        k_value = {
+            "開盤": round(close * rng.uniform(0.97, 1.03), 2),
+            "最高": high,
+            "最低": round(close * rng.uniform(0.95, 1.0), 2),
+            "收盤": close,
+        }
+        if nulls and rng.random() < 0.05:
+            k_value[rng.choice(PRICE_TYPES)] = None
+        daily_k.append([start + datetime.timedelta(days=i), k_value])
+    return daily_k
+
+
+def _make_df(n_stocks=300, seed=7, nulls=True):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_stocks):
+        row = {"代號": f"{1000 + i}"}
+        # 長度 1..12 天，涵蓋歷史不足的情形；各指標長度不一定相同
+        row["daily_k"] = _random_daily_k(rng, rng.randint(1, 12), nulls)
+        for indicator in INDICATORS:
+            row[indicator] = _random_history(rng, rng.randint(1, 12), 50, nulls)
+        # 部分股票抓取失敗，欄位為 NA
+        if rng.random() < 0.1:
+            row[rng.choice(["daily_k"] + INDICATORS)] = pd.NA
+        rows.append(row)
+    df = pd.DataFrame(rows).set_index("代號")
+    # 固定的邊界案例：剛好 5% 的整數價漲幅
+    df.at["1000", "daily_k"] = [
+        [datetime.date(2025, 1, 1), {"開盤": 30.0, "最高": 30.0, "最低": 30.0, "收盤": 30.0}],
+        [datetime.date(2025, 1, 2), {"開盤": 31.5, "最高": 31.5, "最低": 31.5, "收盤": 31.5}],
+    ]
+    return df
+
+
+def _with_history(df):
+    df = df.copy()
+    df.attrs["hist"] = technical.build_indicator_history(df)
+    return df
+
+
+@pytest.fixture(params=["lists", "hist"])
+def market_df(request):
+    df = _make_df()
+    return df if request.param == "lists" else _with_history(df)
+
+
+def _expected(df, func, **kwargs):
+    return df.apply(func, axis=1, **kwargs).astype(bool).tolist()
+
+
+# =============================================================================
+# 一致性測試
+# =============================================================================
+@pytest.mark.parametrize("days", [1, 3, 5])
+@pytest.mark.parametrize("shares_threshold", [45, 55])
+def test_volume_greater_check_matches_row(market_df, shares_threshold, days):
+    result = technical.volume_greater_check_df(market_df, shares_threshold, days)
+    assert result.tolist() == _expected(
+        market_df, _volume_greater_row, shares_threshold=shares_threshold, days=days)
+
+
+@pytest.mark.parametrize("days", [1, 2, 5])
+@pytest.mark.parametrize("direction", ["more", "less"])
+@pytest.mark.parametrize("indicator_1, indicator_2, threshold", [
+    ("收盤", "開盤", 1.01),
+    ("最低", "mean5", 1),
+    ("k9", "d9", 1),
+])
+def test_one_day_check_matches_row(market_df, indicator_1, indicator_2, threshold, direction, days):
+    result = technical.technical_indicator_greater_or_less_one_day_check_df(
+        market_df, indicator_1, indicator_2, direction, threshold, days)
+    assert result.tolist() == _expected(
+        market_df, _one_day_row, indicator_1=indicator_1, indicator_2=indicator_2,
+        direction=direction, threshold=threshold, days=days)
+
+
+@pytest.mark.parametrize("days", [1, 3])
+def test_difference_one_day_check_matches_row(market_df, days):
+    result = technical.technical_indicator_difference_one_day_check_df(
+        market_df, "k9", "d9", 10, days)
+    assert result.tolist() == _expected(
+        market_df, _difference_one_day_row, indicator_1="k9", indicator_2="d9",
+        difference_threshold=10, days=days)
+
+
+@pytest.mark.parametrize("days", [1, 2])
+@pytest.mark.parametrize("direction", ["more", "less"])
+@pytest.mark.parametrize("indicator_1, indicator_2, threshold", [
+    ("收盤", "收盤", 1.05),
+    ("收盤", "最高", 0.997),
+    ("volume", "volume", 1),
+])
+def test_two_day_check_matches_row(market_df, indicator_1, indicator_2, threshold, direction, days):
+    result = technical.technical_indicator_greater_or_less_two_day_check_df(
+        market_df, indicator_1, indicator_2, direction, threshold, days)
+    assert result.tolist() == _expected(
+        market_df, _two_day_row, indicator_1=indicator_1, indicator_2=indicator_2,
+        direction=direction, threshold=threshold, days=days)
+
+
+@pytest.mark.parametrize("days", [1, 2])
+@pytest.mark.parametrize("direction", ["more", "less"])
+def test_difference_two_day_check_matches_row(market_df, direction, days):
+    result = technical.technical_indicator_difference_two_day_check_df(
+        market_df, "最高", "收盤", direction, 0.02, "收盤", days)
+    assert result.tolist() == _expected(
+        market_df, _difference_two_day_row, indicator_1="最高", indicator_2="收盤",
+        direction=direction, threshold=0.02, indicator_3="收盤", days=days)
+
+
+@pytest.mark.parametrize("days", [1, 5])
+@pytest.mark.parametrize("direction, threshold", [("more", 50), ("less", 55)])
+@pytest.mark.parametrize("indicator", ["收盤", "k9"])
+def test_constant_check_matches_row(market_df, indicator, direction, threshold, days):
+    result = technical.technical_indicator_constant_check_df(
+        market_df, indicator, direction, threshold, days)
+    assert result.tolist() == _expected(
+        market_df, _constant_row, indicator=indicator, direction=direction,
+        threshold=threshold, days=days)
+
+
+@pytest.mark.parametrize("n_days, k_change", [(3, 0.1), (6, 0.12)])
+@pytest.mark.parametrize("consecutive_red_no_upper_shadow_days", [0, 1, 2, 3])
+def test_skyrocket_check_matches_row(market_df, n_days, k_change, consecutive_red_no_upper_shadow_days):
+    result = technical.skyrocket_check_df(
+        market_df, n_days, k_change, consecutive_red_no_upper_shadow_days)
+    assert result.tolist() == _expected(
+        market_df, _skyrocket_row, n_days=n_days, k_change=k_change,
+        consecutive_red_no_upper_shadow_days=consecutive_red_no_upper_shadow_days)
+
+
+def test_history_subset_aligns_by_index():
+    df = _with_history(_make_df())
+    subset = df.iloc[::7]
+    result = technical.technical_indicator_constant_check_df(subset, "收盤", "more", 50, 3)
+    assert result.tolist() == _expected(
+        subset, _constant_row, indicator="收盤", direction="more", threshold=50, days=3)
+
+
+def test_exact_five_percent_move_is_not_above_threshold():
+    df = _with_history(_make_df())
+    result = technical.technical_indicator_greater_or_less_two_day_check_df(
+        df, "收盤", "收盤", "more", 1.05, days=1)
+    assert not result["1000"]
+    assert np.isclose(1.05 * 30.0, 31.5)
+
+
+def _null_window_df():
+    start = datetime.date(2025, 1, 1)
+    dates = [start + datetime.timedelta(days=i) for i in range(5)]
+    daily_k = [[d, {"開盤": 10.0, "最高": 11.0, "最低": 10.0, "收盤": 10.5}] for d in dates]
+    mean20 = [[d, v] for d, v in zip(dates, [9.0, 9.0, None, 9.0, 9.0])]
+    return pd.DataFrame({"代號": ["2330"], "daily_k": [daily_k], "mean20": [mean20]}).set_index("代號")
+
+
+@pytest.mark.parametrize("with_history", [False, True])
+def test_null_inside_window_fails(with_history):
+    df = _null_window_df()
+    if with_history:
+        df = _with_history(df)
+    one_day = technical.technical_indicator_greater_or_less_one_day_check_df(
+        df, "最低", "mean20", "more", 1, days=5)
+    constant = technical.technical_indicator_constant_check_df(df, "mean20", "more", 5, days=3)
+    assert not one_day["2330"]
+    assert not constant["2330"]
+    # 只看最近兩天時 None 不在視窗內
+    assert technical.technical_indicator_constant_check_df(df, "mean20", "more", 5, days=2)["2330"]
+
+
+@pytest.mark.parametrize("with_history", [False, True])
+def test_skyrocket_null_close_fails(with_history):
+    start = datetime.date(2025, 1, 1)
+    daily_k = [
+        [start + datetime.timedelta(days=i), {"開盤": close, "最高": close, "最低": close, "收盤": close}]
+        for i, close in enumerate([None, 10.0, 10.0, 10.0, 12.0])
+    ]
+    df = pd.DataFrame({"代號": ["2330"], "daily_k": [daily_k]}).set_index("代號")
+    if with_history:
+        df = _with_history(df)
+    assert not technical.skyrocket_check_df(df, 3, 0.1, 0)["2330"]
+    assert not _skyrocket_row(df.loc["2330"], 3, 0.1, 0)